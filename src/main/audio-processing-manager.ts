@@ -8,6 +8,7 @@ import {
   WhisperModel, 
   ProcessingOptions, 
   TranscriptionResult,
+  TranscriptionSegment,
   DependencyStatus,
   ProgressStatus,
   FormattingOptions
@@ -348,9 +349,11 @@ export class PythonAudioProcessingManager implements AudioProcessingManager, Pro
         let stdout = '';
         let stderr = '';
         
-        process.stdout.on('data', (data) => {
-          stdout += data.toString();
-          this.handlePythonOutput(data.toString());
+        // Results are raw UTF-8; decode across chunk boundaries
+        process.stdout.setEncoding('utf8');
+        process.stdout.on('data', (data: string) => {
+          stdout += data;
+          this.handlePythonOutput(data);
         });
         
         process.stderr.on('data', (data) => {
@@ -379,23 +382,24 @@ export class PythonAudioProcessingManager implements AudioProcessingManager, Pro
           }
           
           try {
-            // Find the last valid JSON in stdout
-            // Split the stdout by lines and find the last complete JSON object
+            // Find the last valid JSON in stdout, collecting the segments
+            // that backends stream as they are transcribed along the way
             const lines = stdout.split('\n');
             let lastValidJson = null;
+            const streamedSegments: TranscriptionSegment[] = [];
             
-            // Iterate through lines from the end to find the last valid JSON
-            for (let i = lines.length - 1; i >= 0; i--) {
-              const line = lines[i].trim();
+            for (const rawLine of lines) {
+              const line = rawLine.trim();
               if (!line) continue;
               
               try {
                 // Try to parse the line as JSON
                 const parsedJson = JSON.parse(line);
-                // Check if it has the success property (final result)
-                if ('success' in parsedJson) {
+                if (parsedJson.segment) {
+                  streamedSegments.push(parsedJson.segment);
+                } else if ('success' in parsedJson) {
+                  // Final result
                   lastValidJson = parsedJson;
-                  break;
                 }
               } catch (e) {
                 // Not valid JSON, continue searching
@@ -428,7 +432,7 @@ export class PythonAudioProcessingManager implements AudioProcessingManager, Pro
             if (result.success && result.result) {
               const transcriptionResult: TranscriptionResult = {
                 text: result.result.text || "",
-                segments: result.result.segments || [],
+                segments: result.result.segments || streamedSegments,
                 processingTime: result.result.processingTime || 0,
                 modelUsed: result.result.modelUsed || model,
                 audioSeparationUsed: filePath !== this.originalFilePath // Check if we used separated audio
@@ -600,7 +604,10 @@ export class PythonAudioProcessingManager implements AudioProcessingManager, Pro
         }, timeoutMs);
         
         if (process.stdout) {
-          process.stdout.on('data', (data: Buffer) => {
+          // Decode as a UTF-8 stream so multi-byte characters split across
+          // chunks are not corrupted (the script writes raw UTF-8 JSON)
+          process.stdout.setEncoding('utf8');
+          process.stdout.on('data', (data: string) => {
             stdout += data.toString();
             
             try {
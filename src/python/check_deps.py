@@ -3,9 +3,63 @@
 
 import sys
 import json
+import argparse
 import importlib
 import subprocess
+import shutil
 import os
+import stat
+import errno
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    
+    def _encode(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def _encode(obj):
+        return json.dumps(obj).encode("utf-8")
+
+def emit(message):
+    """Send one JSON message to the parent process with a single write"""
+    sys.stdout.buffer.write(_encode(message) + b"\n")
+    sys.stdout.buffer.flush()
+
+# Cache of os.stat results keyed by path; None means the path does not exist
+_stat_cache = {}
+
+def _cached_stat(path):
+    """Return the st_mode of a path, caching both hits and ENOENT misses"""
+    if path in _stat_cache:
+        return _stat_cache[path]
+    try:
+        mode = os.stat(path).st_mode
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            return None
+        mode = None
+    _stat_cache[path] = mode
+    return mode
+
+def _cached_isfile(path):
+    mode = _cached_stat(path)
+    return mode is not None and stat.S_ISREG(mode)
+
+def _cached_isdir(path):
+    mode = _cached_stat(path)
+    return mode is not None and stat.S_ISDIR(mode)
+
+@lru_cache(maxsize=1)
+def _scan_hf_hub():
+    """Return the names of all directories in the Hugging Face hub cache"""
+    hub_dir = os.path.join(os.path.expanduser("~"), ".cache", "huggingface", "hub")
+    try:
+        with os.scandir(hub_dir) as entries:
+            return frozenset(entry.name for entry in entries if entry.is_dir())
+    except OSError:
+        return frozenset()
 
 def check_python_version():
     """Check if Python version meets the minimum requirements"""
@@ -35,16 +89,18 @@ def check_module_installed(module_name):
         }
 
 def check_whisper_model(model_path):
-    if os.path.isdir(model_path):
-        # Check for expected files in model directory
+    if _cached_isdir(model_path):
+        # Check for expected files in model directory with a single listing
         expected_files = ["model.bin", "config.json"]
-        for file in expected_files:
-            if not os.path.isfile(os.path.join(model_path, file)):
-                return False
-        return True
+        try:
+            with os.scandir(model_path) as entries:
+                found_files = {entry.name for entry in entries if entry.is_file()}
+        except OSError:
+            return False
+        return all(file in found_files for file in expected_files)
     return False
 
-def check_demucs():
+def check_demucs(deep=False):
     """Check if demucs is installed and available as a command"""
     module_status = check_module_installed("demucs")
     
@@ -56,7 +112,18 @@ def check_demucs():
             "error": "Demucs Python module not installed"
         }
     
-    # Additional check to see if demucs command is available
+    # Locate the demucs command on PATH without spawning it; the version is
+    # already known from the imported module
+    if not deep:
+        command_available = shutil.which("demucs") is not None
+        return {
+            "installed": True,
+            "command_available": command_available,
+            "version": module_status["version"],
+            "error": None if command_available else "demucs command not found in PATH"
+        }
+    
+    # Deep verification: actually run the demucs command
     try:
         result = subprocess.run(
             ["demucs", "--version"], 
@@ -120,9 +187,11 @@ def check_model_availability(model_name):
     
     if model_name.startswith("faster-whisper"):
         model_size = model_name.split("-")[-1]
-        model_path = os.path.join(home_dir, ".cache", "huggingface", "hub", f"models--guillaumekln--faster-whisper-{model_size}")
+        model_dir_name = f"models--guillaumekln--faster-whisper-{model_size}"
+        model_path = os.path.join(home_dir, ".cache", "huggingface", "hub", model_dir_name)
         
-        is_available = check_whisper_model(model_path)
+        # One listing of the hub directory answers presence for every model
+        is_available = model_dir_name in _scan_hf_hub() and check_whisper_model(model_path)
         
         return {
             "available": is_available,
@@ -135,7 +204,7 @@ def check_model_availability(model_name):
         model_size = "-".join(model_name.split("-")[2:])  # Get model size (large-v3-turbo)
         model_path = os.path.join(home_dir, ".cache", "whisper", model_size)
         
-        is_available = os.path.isfile(model_path)
+        is_available = _cached_isfile(model_path)
         
         return {
             "available": is_available,
@@ -155,31 +224,47 @@ def check_model_availability(model_name):
 
 def main():
     """Check the system for all required dependencies and report results"""
-    python_status = check_python_version()
-    demucs_status = check_demucs()
-    faster_whisper_status = check_faster_whisper()
-    openai_whisper_status = check_openai_whisper()
-    
-    # Check models only if the corresponding package is installed
-    models = {}
+    parser = argparse.ArgumentParser(description="Check Python dependencies and models")
+    parser.add_argument("--deep", action="store_true", help="Run external commands to verify they work")
     
-    if faster_whisper_status["installed"]:
-        models["faster-whisper-small"] = check_model_availability("faster-whisper-small")
-        models["faster-whisper-medium"] = check_model_availability("faster-whisper-medium")
+    args = parser.parse_args()
     
-    if openai_whisper_status["installed"]:
-        models["openai-whisper-large-v3-turbo"] = check_model_availability("openai-whisper-large-v3-turbo")
+    # Run the independent checks concurrently; the demucs check and the
+    # module imports dominate wall time, so total time is bounded by the
+    # slowest check instead of the sum of all of them
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        python_future = executor.submit(check_python_version)
+        demucs_future = executor.submit(check_demucs, args.deep)
+        faster_whisper_future = executor.submit(check_faster_whisper)
+        openai_whisper_future = executor.submit(check_openai_whisper)
+        
+        faster_whisper_status = faster_whisper_future.result()
+        openai_whisper_status = openai_whisper_future.result()
+        
+        # Check models only if the corresponding package is installed
+        model_futures = {}
+        
+        if faster_whisper_status["installed"]:
+            for model_name in ("faster-whisper-small", "faster-whisper-medium"):
+                model_futures[model_name] = executor.submit(check_model_availability, model_name)
+        
+        if openai_whisper_status["installed"]:
+            model_name = "openai-whisper-large-v3-turbo"
+            model_futures[model_name] = executor.submit(check_model_availability, model_name)
+        
+        python_status = python_future.result()
+        demucs_status = demucs_future.result()
+        models = {name: future.result() for name, future in model_futures.items()}
     
     # Create summary status fields
     result = {
-        "python": python_status["meets_requirements"] if isinstance(python_status, dict) else python_status,
-        "demucs": demucs_status["installed"] if isinstance(demucs_status, dict) else demucs_status,
-        "fasterWhisper": faster_whisper_status["installed"] if isinstance(faster_whisper_status, dict) else faster_whisper_status,
-        "openaiWhisper": openai_whisper_status["installed"] if isinstance(openai_whisper_status, dict) else openai_whisper_status,
+        "python": python_status["meets_requirements"],
+        "demucs": demucs_status["installed"],
+        "fasterWhisper": faster_whisper_status["installed"],
+        "openaiWhisper": openai_whisper_status["installed"],
         "models": {
-            "faster-whisper-small": models.get("faster-whisper-small", {}).get("available", False) if "faster-whisper-small" in models else False,
-            "faster-whisper-medium": models.get("faster-whisper-medium", {}).get("available", False) if "faster-whisper-medium" in models else False,
-            "openai-whisper-large-v3-turbo": models.get("openai-whisper-large-v3-turbo", {}).get("available", False) if "openai-whisper-large-v3-turbo" in models else False
+            model_name: models[model_name]["available"] if model_name in models else False
+            for model_name in ("faster-whisper-small", "faster-whisper-medium", "openai-whisper-large-v3-turbo")
         },
         # Detailed status for more information
         "details": {
@@ -191,7 +276,7 @@ def main():
         }
     }
     
-    print(json.dumps(result))
+    emit(result)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
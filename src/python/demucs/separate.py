@@ -2,17 +2,59 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import json
 import argparse
 import tempfile
 import subprocess
+import selectors
+import codecs
+import contextlib
+import io
 import time
+from collections import deque
 from pathlib import Path
 import shutil
 
+def emit(message):
+    """
+    Send one JSON message to the parent process
+    
+    stdout carries only these newline-delimited messages; diagnostics go to
+    stderr. Each message is written with a single write and flush, to the real
+    stdout even while demucs's console output is redirected.
+    """
+    stdout = sys.__stdout__
+    stdout.flush()
+    stdout.buffer.write(json.dumps(message).encode("utf-8") + b"\n")
+    stdout.buffer.flush()
+
+# Percentage and stage markers in demucs progress output
+_PROGRESS_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+_STAGE_RE = re.compile(r'overlap-add|writing', re.IGNORECASE)
+_STAGE_PROGRESS = {"overlap-add": 85, "writing": 90}
+
+# Last progress report, used to drop redundant high-frequency updates
+_last_report_time = 0.0
+_last_report_pct = None
+_last_report_stage = None
+
 def report_progress(progress, stage="separation", estimated_time_remaining=None):
     """Report progress to the parent process"""
+    global _last_report_time, _last_report_pct, _last_report_stage
+    
+    # Skip updates that repeat the same percentage within 100 ms
+    now = time.monotonic()
+    if (stage == _last_report_stage
+            and _last_report_pct is not None
+            and abs(progress - _last_report_pct) < 1
+            and now - _last_report_time < 0.1):
+        return
+    _last_report_time = now
+    _last_report_pct = progress
+    _last_report_stage = stage
+    
     data = {
         "stage": stage,
         "percent": progress,
@@ -21,9 +63,235 @@ def report_progress(progress, stage="separation", estimated_time_remaining=None)
     if estimated_time_remaining is not None:
         data["estimatedTimeRemaining"] = estimated_time_remaining
     
-    # Make sure to add a newline to separate JSON objects
-    print(json.dumps({"progress": data}))
-    print(flush=True)  # Ensure output is flushed with a newline
+    emit({"progress": data})
+
+def report_demucs_output(line):
+    """
+    Report progress for one line of demucs output
+    
+    Progress lines are echoed to stderr for debugging; other lines are
+    ignored.
+    """
+    match = _PROGRESS_RE.search(line)
+    if match:
+        sys.__stderr__.write(line)
+        report_progress(min(int(float(match.group(1))), 80), "separation")
+        return
+    
+    match = _STAGE_RE.search(line)
+    if match:
+        sys.__stderr__.write(line)
+        report_progress(_STAGE_PROGRESS[match.group().lower()], "separation")
+
+class DemucsOutputWriter(io.TextIOBase):
+    """
+    Text stream that reports progress from demucs's in-process console output
+    
+    Output is split into lines (carriage returns from progress bars count as
+    line breaks) and each line is passed to report_demucs_output(). The tail
+    of the output is kept so it can be dumped if demucs fails.
+    """
+    
+    def __init__(self, tail_size=200):
+        self._pending = ""
+        self.output_tail = deque(maxlen=tail_size)
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        pending = self._pending + text
+        lines = pending.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._handle_line(line + "\n")
+        return len(text)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        if self._pending:
+            self._handle_line(self._pending + "\n")
+            self._pending = ""
+        super().close()
+    
+    def _handle_line(self, line):
+        self.output_tail.append(line)
+        report_demucs_output(line)
+
+def iter_process_output(process, chunk_size=65536):
+    """
+    Yield (stream_name, line) pairs from a running process's stdout and stderr
+    
+    Both pipes are drained concurrently with a selector and read in large
+    chunks, so neither stream can fill its pipe buffer and stall the child.
+    Carriage returns (used by progress bars) are treated as line breaks.
+    """
+    selector = selectors.DefaultSelector()
+    buffers = {}
+    for name, stream in (("stdout", process.stdout), ("stderr", process.stderr)):
+        os.set_blocking(stream.fileno(), False)
+        selector.register(stream.fileno(), selectors.EVENT_READ, name)
+        buffers[name] = ("", codecs.getincrementaldecoder("utf-8")(errors="replace"))
+    
+    try:
+        while selector.get_map():
+            for key, _ in selector.select(timeout=0.1):
+                name = key.data
+                pending, decoder = buffers[name]
+                try:
+                    data = os.read(key.fd, chunk_size)
+                except BlockingIOError:
+                    continue
+                
+                if not data:
+                    # EOF: flush whatever is left of the last line
+                    selector.unregister(key.fd)
+                    pending += decoder.decode(b"", final=True)
+                    if pending:
+                        yield name, pending
+                    buffers[name] = ("", decoder)
+                    continue
+                
+                pending += decoder.decode(data)
+                lines = pending.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+                buffers[name] = (lines.pop(), decoder)
+                for line in lines:
+                    yield name, line + "\n"
+    finally:
+        selector.close()
+
+# Use the demucs command line tool directly with its absolute path
+# The demucs script is located at /Users/rkuros/Library/Python/3.9/bin/demucs
+DEMUCS_PATH = "/Users/rkuros/Library/Python/3.9/bin/demucs"
+
+def run_demucs_in_process(demucs_args):
+    """
+    Run demucs inside the current Python interpreter
+    
+    Avoids starting a second interpreter and re-importing torch for every
+    separation.
+    
+    Args:
+        demucs_args: Command line arguments for demucs (without the program name)
+    
+    Returns:
+        The demucs exit status, or None if demucs cannot be imported
+    """
+    try:
+        from demucs.separate import main as demucs_main
+    except ImportError as e:
+        print(f"Could not import demucs in-process: {e}", file=sys.stderr)
+        print("Falling back to running demucs as a subprocess...", file=sys.stderr)
+        return None
+    
+    report_progress(30, "separation")
+    print(f"Running demucs in-process with arguments: {' '.join(demucs_args)}", file=sys.stderr)
+    
+    # Keep demucs's own console output off the message stream and turn its
+    # progress bar into progress reports, so the parent sees regular updates
+    # while the separation runs
+    writer = DemucsOutputWriter()
+    try:
+        with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+            demucs_main(demucs_args)
+        return_code = 0
+    except SystemExit as e:
+        # demucs reports command line and runtime errors through sys.exit()
+        if e.code is None or isinstance(e.code, int):
+            return_code = e.code or 0
+        else:
+            writer.write(f"{e.code}\n")
+            return_code = 1
+    finally:
+        writer.close()
+    
+    if return_code != 0:
+        sys.stderr.write("".join(writer.output_tail))
+    
+    return return_code
+
+def build_demucs_command(demucs_args):
+    """Build the command line used to run demucs as a subprocess"""
+    if not os.path.isfile(DEMUCS_PATH):
+        print(f"Demucs command not found at {DEMUCS_PATH}", file=sys.stderr)
+        print("Falling back to python module approach...", file=sys.stderr)
+        
+        # Try to use demucs as a Python module
+        try:
+            import importlib.util
+            
+            # Verify demucs is installed
+            spec = importlib.util.find_spec("demucs")
+            if spec is None:
+                raise ImportError("demucs module is not installed")
+                
+            # Use Python directly to invoke the module
+            python_path = sys.executable
+            report_progress(20, "separation")
+            
+            print(f"Using Python at {python_path} to run demucs module", file=sys.stderr)
+            return [python_path, "-m", "demucs.separate"] + demucs_args
+        except ImportError as ie:
+            print(f"Error importing demucs: {ie}", file=sys.stderr)
+            print("Falling back to basic Python subprocess with demucs...", file=sys.stderr)
+            
+            # Last resort: try running the command directly
+            return ["python3", "-m", "demucs.separate"] + demucs_args
+    
+    # Use the absolute path to the demucs command
+    print(f"Using demucs at {DEMUCS_PATH}", file=sys.stderr)
+    return [DEMUCS_PATH] + demucs_args
+
+def run_demucs_subprocess(cmd):
+    """
+    Run demucs as a subprocess, reporting progress parsed from its output
+    
+    Returns:
+        The process return code
+    """
+    report_progress(30, "separation")
+    print(f"Running command: {' '.join(cmd)}", file=sys.stderr)
+    
+    # Resolve the executable to an absolute path so the PATH lookup happens
+    # here rather than in the child
+    executable = shutil.which(cmd[0]) or cmd[0]
+    
+    # Run the demucs command with progress monitoring
+    # CPython only launches the child with posix_spawn() (instead of fork()
+    # copying this process's page tables, which can be large once torch is
+    # loaded) when the executable has a directory component and there is no
+    # preexec_fn, cwd, or close_fds=True. Our own descriptors are already
+    # non-inheritable, so close_fds=False is safe.
+    process = subprocess.Popen(
+        [executable] + cmd[1:],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        close_fds=False
+    )
+    
+    # Keep only the tail of the output; it is dumped if demucs fails
+    output_tail = deque(maxlen=200)
+    
+    # Monitor progress
+    for source, line in iter_process_output(process):
+        output_tail.append(line)
+        
+        if source != "stderr":
+            continue
+        
+        # Parse progress from output, echoing only progress lines for debugging
+        report_demucs_output(line)
+    
+    # Get return code
+    return_code = process.wait()
+    
+    print(f"Return code: {return_code}", file=sys.stderr)
+    if return_code != 0:
+        sys.stderr.write("".join(output_tail))
+    
+    return return_code
 
 def separate_audio(input_file, output_dir=None, fast_mode=True):
     """
@@ -61,127 +329,24 @@ def separate_audio(input_file, output_dir=None, fast_mode=True):
     # Report initial progress
     report_progress(10, "separation")
     
-    # Use the demucs command line tool directly with its absolute path
-    # The demucs script is located at /Users/rkuros/Library/Python/3.9/bin/demucs
-    DEMUCS_PATH = "/Users/rkuros/Library/Python/3.9/bin/demucs"
-    
-    if not os.path.isfile(DEMUCS_PATH):
-        print(f"Demucs command not found at {DEMUCS_PATH}")
-        print("Falling back to python module approach...")
-        
-        # Try to use demucs as a Python module
-        try:
-            import sys
-            import importlib
-            
-            # Verify demucs is installed
-            spec = importlib.util.find_spec("demucs")
-            if spec is None:
-                raise ImportError("demucs module is not installed")
-                
-            # Use Python directly to invoke the module
-            python_path = sys.executable
-            report_progress(20, "separation")
-            
-            print(f"Using Python at {python_path} to run demucs module")
-            cmd = [
-                python_path,
-                "-m",
-                "demucs.separate",
-                "--two-stems=vocals",
-                "-o", output_dir,
-                "--mp3",
-                "--shifts=0",   # Disable shifts for faster processing
-                "--overlap=0",  # Minimum overlap for faster processing
-                "--mp3-preset=7",  # Fastest encoding speed for MP3
-                "-j", "2",      # Use 2 jobs for parallel processing
-                input_file
-            ]
-            
-            print(f"Running command: {' '.join(cmd)}")
-        except ImportError as ie:
-            print(f"Error importing demucs: {ie}")
-            print("Falling back to basic Python subprocess with demucs...")
-            
-            # Last resort: try running the command directly
-            cmd = [
-                "python3",
-                "-m",
-                "demucs.separate",
-                "--two-stems=vocals",
-                "-o", output_dir,
-                "--mp3",
-                "--shifts=0",   # Disable shifts for faster processing
-                "--overlap=0",  # Minimum overlap for faster processing
-                "--mp3-preset=7",  # Fastest encoding speed for MP3
-                "-j", "2",      # Use 2 jobs for parallel processing
-                input_file
-            ]
-    else:
-        # Use the absolute path to the demucs command
-        print(f"Using demucs at {DEMUCS_PATH}")
-        cmd = [
-            DEMUCS_PATH,
-            "--two-stems=vocals",
-            "-o", output_dir,
-            "--mp3",
-            "--shifts=0",   # Disable shifts for faster processing
-            "--overlap=0",  # Minimum overlap for faster processing
-            "--mp3-preset=7",  # Fastest encoding speed for MP3
-            "-j", "2",      # Use 2 jobs for parallel processing
-            input_file
-        ]
-        
-    report_progress(30, "separation")
-    print(f"Running command: {' '.join(cmd)}")
+    # Arguments shared by every way of invoking demucs
+    demucs_args = [
+        "--two-stems=vocals",
+        "-o", output_dir,
+        "--mp3",
+        "--shifts=0",   # Disable shifts for faster processing
+        "--overlap=0",  # Minimum overlap for faster processing
+        "--mp3-preset=7",  # Fastest encoding speed for MP3
+        "-j", "2",      # Use 2 jobs for parallel processing
+        input_file
+    ]
     
     try:
-        # Run the demucs command with progress monitoring
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            env={
-                **os.environ,
-                "PATH": f"{os.path.dirname(DEMUCS_PATH)}:{os.environ.get('PATH', '')}"
-            }
-        )
-        
-        # Monitor progress
-        while True:
-            line = process.stderr.readline()
-            if not line:
-                stdout_line = process.stdout.readline()
-                if not stdout_line and process.poll() is not None:
-                    break
-                if stdout_line:
-                    print(stdout_line, end='')
-                continue
-                
-            print(line, end='')  # Print the line for debugging
-            
-            # Parse progress from output
-            if "%" in line:
-                try:
-                    percent_part = line.split("%")[0].strip().split(" ")[-1]
-                    current_progress = min(int(float(percent_part)), 80)
-                    report_progress(current_progress, "separation")
-                except (ValueError, IndexError):
-                    pass
-            elif "overlap-add" in line.lower():
-                report_progress(85, "separation")
-            elif "writing" in line.lower():
-                report_progress(90, "separation")
-        
-        # Get return code and remaining output
-        return_code = process.wait()
-        stderr_remainder = process.stderr.read()
-        stdout_remainder = process.stdout.read()
-        
-        print(f"Command stdout: {stdout_remainder}")
-        print(f"Command stderr: {stderr_remainder}")
-        print(f"Return code: {return_code}")
+        # Prefer running demucs in this interpreter; only spawn a separate
+        # process when the module cannot be imported here
+        return_code = run_demucs_in_process(demucs_args)
+        if return_code is None:
+            return_code = run_demucs_subprocess(build_demucs_command(demucs_args))
         
         if return_code != 0:
             raise RuntimeError(f"Demucs command failed with return code {return_code}")
@@ -193,33 +358,34 @@ def separate_audio(input_file, output_dir=None, fast_mode=True):
         
         # If the file doesn't exist at the expected location, try to find it
         if not os.path.isfile(vocals_file):
-            print(f"Vocals file not found at expected path: {vocals_file}")
-            print("Searching for vocals file in output directory...")
+            print(f"Vocals file not found at expected path: {vocals_file}", file=sys.stderr)
+            print("Searching for vocals file in output directory...", file=sys.stderr)
             
-            # Search for vocals file in the output directory
-            for root, _, files in os.walk(output_dir):
-                for file in files:
-                    if "vocals" in file.lower() and file.endswith((".mp3", ".wav")):
-                        vocals_file = os.path.join(root, file)
-                        print(f"Found vocals file at: {vocals_file}")
-                        break
-                if os.path.isfile(vocals_file):
-                    break
+            # Demucs writes WAV when MP3 output is unavailable; check that
+            # path directly before searching the output directory
+            vocals_file = os.path.join(separated_dir, "vocals.wav")
+            if not os.path.isfile(vocals_file):
+                output_path = Path(output_dir)
+                match = next(output_path.rglob("vocals.mp3"), None) or next(output_path.rglob("vocals.wav"), None)
+                vocals_file = str(match) if match else ""
+            
+            if vocals_file:
+                print(f"Found vocals file at: {vocals_file}", file=sys.stderr)
         
         if not os.path.isfile(vocals_file):
             raise FileNotFoundError(f"Could not locate separated vocals track in {output_dir}")
         
         report_progress(95, "separation")
-        print(f"Successfully separated vocals: {vocals_file}")
+        print(f"Successfully separated vocals: {vocals_file}", file=sys.stderr)
         
         # Clean up the no-vocals track if it exists to save disk space
         no_vocals_file = os.path.join(separated_dir, "no_vocals.mp3")
         if os.path.isfile(no_vocals_file):
             try:
                 os.remove(no_vocals_file)
-                print(f"Removed unnecessary no_vocals file: {no_vocals_file}")
+                print(f"Removed unnecessary no_vocals file: {no_vocals_file}", file=sys.stderr)
             except Exception as e:
-                print(f"Failed to remove no_vocals file: {e}")
+                print(f"Failed to remove no_vocals file: {e}", file=sys.stderr)
                 
         # Clean up any other unnecessary files in the separated directory
         try:
@@ -228,17 +394,17 @@ def separate_audio(input_file, output_dir=None, fast_mode=True):
                     if file != os.path.basename(vocals_file) and not file.startswith("."):
                         try:
                             os.remove(os.path.join(root, file))
-                            print(f"Removed unnecessary file: {os.path.join(root, file)}")
+                            print(f"Removed unnecessary file: {os.path.join(root, file)}", file=sys.stderr)
                         except Exception as e:
-                            print(f"Failed to remove file {file}: {e}")
+                            print(f"Failed to remove file {file}: {e}", file=sys.stderr)
         except Exception as e:
-            print(f"Error cleaning up files: {e}")
+            print(f"Error cleaning up files: {e}", file=sys.stderr)
         
         report_progress(100, "separation")
         return vocals_file
         
     except Exception as e:
-        print(f"Error during audio separation: {str(e)}")
+        print(f"Error during audio separation: {str(e)}", file=sys.stderr)
         # If we encountered an error, return the original file
         return input_file
 
@@ -252,9 +418,9 @@ def main():
     
     try:
         vocal_path = separate_audio(args.input, args.output_dir, args.fast)
-        print(json.dumps({"success": True, "vocal_path": vocal_path}), flush=True)
+        emit({"success": True, "vocal_path": vocal_path})
     except Exception as e:
-        print(json.dumps({"success": False, "error": str(e)}), flush=True)
+        emit({"success": False, "error": str(e)})
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,17 +2,146 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import json
+import time
 import argparse
 import signal
+from functools import lru_cache
+from itertools import accumulate, chain, groupby
+from operator import itemgetter
 from pathlib import Path
 
+try:
+    import orjson
+    
+    def _encode(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def _encode(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
 # Handle SIGPIPE gracefully - important when parent process may close pipe
 signal.signal(signal.SIGPIPE, signal.SIG_DFL)
 
+# Debug output to stderr, enabled with FORMAT_DEBUG=1 or --debug
+_DEBUG = os.environ.get("FORMAT_DEBUG") == "1"
+
+# Pipeline components whose output is never read; only sentence boundaries
+# (from the parser) and token text are used
+_UNUSED_PIPES = ["ner", "attribute_ruler", "lemmatizer", "bunsetu_recognizer"]
+
+# フィラー語（post_process_textで削除）
+FILLER_WORDS = [
+    "あの", "えーと", "えっと", "まぁ", "あー", "えー", "んー", "そのー"
+]
+
+# 文末記号と段落の終わりを示す表現
+_SENTENCE_TERMINATORS = frozenset(["。", "！", "？", ".", "!", "?"])
+_PARAGRAPH_ENDINGS = (
+    "です。", "ました。", "でした。", "だった。", "である。", "だ。",
+    "だ！", "ですね。", "だろう。", "だろうか。", "ではない。"
+)
+
+def _trie_pattern(words):
+    """
+    Build a regex alternation for words, factored into a prefix trie
+    
+    At each position the regex engine follows a single branch per character
+    instead of retrying every word, similar to an Aho-Corasick automaton.
+    When one word is a prefix of another, the longer word is matched.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+    
+    return build(trie)
+
+# 段落の区切りとなる、文頭の対話表現・話題転換表現
+DIALOGUE_MARKERS = ['ですか', 'でしょうか', 'わかりました', 'はい', 'いいえ', 'そうですね', 'なるほど',
+                    'ありがとう', 'えー', 'ええ', 'さようなら', '確かに', '失礼', 'そうなんですか']
+TOPIC_SHIFT_MARKERS = ['でも', 'しかし', 'ところで', 'また', 'そして', 'そういえば', '次に', 'ただ', 'まずは']
+ALL_MARKERS = DIALOGUE_MARKERS + TOPIC_SHIFT_MARKERS
+
+# 半角の句読点を全角に変換するテーブル
+_PUNCT_TRANS = str.maketrans({".": "。", ",": "、"})
+_TRAILING_PUNCT = ("。", "！", "？", ".", "!", "?", "、")
+
+# Precompiled regular expressions
+_SPEAKER_RE = re.compile(r'([A-Z\u4e00-\u9faf][A-Za-z\u4e00-\u9faf]*?[\uff1a:])')
+_PUNCT_SPACE_RE = re.compile(r'([、。！？])([^\s])')
+# 英数字とそれ以外（空白を除く）の境界（どちらの順序でも）
+_JP_ALNUM_BOUNDARY_RE = re.compile(
+    r'(?<=[a-zA-Z0-9])(?=[^\sa-zA-Z0-9])|(?<=[^\sa-zA-Z0-9])(?=[a-zA-Z0-9])'
+)
+_WHITESPACE_RE = re.compile(r'\s+')
+# 句読点前のスペース（group 1）または数字と単位の間のスペース（groups 2, 3）
+_PUNCT_SPACE_OR_NUMBER_UNIT_RE = re.compile(r'\s+([、。！？])|(\d+)\s*([年月日時分秒円万%％])')
+# 日本語と英数字の境界（どちらの順序でも）
+_KANA_ALNUM_BOUNDARY_RE = re.compile(
+    r'(?<=[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])(?=[a-zA-Z0-9])'
+    r'|(?<=[a-zA-Z0-9])(?=[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])'
+)
+_FILLER_RE = re.compile(r'\s*' + _trie_pattern(FILLER_WORDS) + r'\s*')
+# 連続するフィラー語（前後の空白を含む）または連続スペース
+_FILLER_OR_SPACE_RUN_RE = re.compile(r'(?:' + _FILLER_RE.pattern + r')+| {2,}')
+_LINE_EDGE_SPACE_RE = re.compile(r'^\s+|\s+$', re.MULTILINE)
+_COMMA_SPACE_RE = re.compile(r'([、,])([^\s\n])')
+_SENTENCE_END_RE = re.compile(r'[。！？.!?]$')
+_JAPANESE_CHAR_RE = re.compile(r'[\u3000-\u9fff]')
+_SENT_END_INSERT_NL_RE = re.compile(r'([。！？?])')
+_SENT_SPLIT_RE = re.compile(r'([。！？]\s*)')
+# A sentence up to its terminator, or whatever trails the last one
+_SENTENCE_RE = re.compile(r'[^。！？!?]+[。！？!?]|[。！？!?]*[^。！？!?]*\Z')
+_EXCESS_NEWLINES_RE = re.compile(r'\n{3,}')
+# A dialogue/topic marker opening a sentence, or a speaker change anywhere in
+# it. Marker alternatives are tried in list order, so the first listed wins.
+_PARAGRAPH_BREAK_RE = re.compile(
+    '^(?P<marker>' + '|'.join(map(re.escape, ALL_MARKERS)) + ')'
+    r'|(?P<speaker>[A-Z\u4e00-\u9faf][A-Za-z\u4e00-\u9faf]*?[：:]\s)'
+)
+
+# Inputs shorter than this are formatted without loading GiNZA
+_MIN_GINZA_LENGTH = 200
+
+# Visible marker placed between paragraphs in the formatted output
+_PARAGRAPH_MARKER = "◆◆◆"
+
+# Number of leading characters inspected when detecting Japanese text
+_LANGUAGE_SAMPLE_LENGTH = 2000
+
+def emit(message, flush=True):
+    """
+    Send one JSON message to the parent process
+    
+    stdout carries only these newline-delimited messages; diagnostics go to
+    stderr. Each message is encoded once and written to the binary buffer in
+    a single call; pass flush=False to let consecutive messages coalesce.
+    """
+    sys.stdout.buffer.write(_encode(message) + b"\n")
+    if flush:
+        sys.stdout.buffer.flush()
+
+# Last progress flush, used to coalesce bursts of progress messages
+_last_flush_time = 0.0
+_last_stage = None
+
 def report_progress(progress, stage="formatting", estimated_time_remaining=None):
     """Report progress to the parent process"""
+    global _last_flush_time, _last_stage
     try:
         data = {
             "stage": stage,
@@ -22,9 +151,14 @@ def report_progress(progress, stage="formatting", estimated_time_remaining=None)
         if estimated_time_remaining is not None:
             data["estimatedTimeRemaining"] = estimated_time_remaining
         
-        # Make sure to add a newline to separate JSON objects
-        print(json.dumps({"progress": data}))
-        sys.stdout.flush()  # More reliable cross-platform flush
+        # Flush on completion, on stage changes, and at most every 0.5 s
+        # otherwise so the parent still sees regular updates
+        now = time.monotonic()
+        flush = progress >= 100 or stage != _last_stage or now - _last_flush_time >= 0.5
+        emit({"progress": data}, flush=flush)
+        if flush:
+            _last_flush_time = now
+        _last_stage = stage
     except BrokenPipeError:
         # Handle the broken pipe gracefully
         # This can happen if the parent process has already closed the pipe
@@ -32,6 +166,22 @@ def report_progress(progress, stage="formatting", estimated_time_remaining=None)
         sys.stderr.flush()
         # Don't re-raise the exception
 
+@lru_cache(maxsize=1)
+def _get_nlp():
+    """Load the GiNZA pipeline once, without the components we never use"""
+    import spacy
+    
+    try:
+        # Excluded components are not even loaded, which also shortens startup
+        return spacy.load("ja_ginza", exclude=_UNUSED_PIPES)
+    except OSError:
+        # If model not found, try loading with direct path
+        print("Default model not found, trying alternative load method", file=sys.stderr)
+        import ja_ginza
+        nlp = ja_ginza.load()
+        nlp.select_pipes(disable=[name for name in _UNUSED_PIPES if name in nlp.pipe_names])
+        return nlp
+
 def format_text_with_ginza(text):
     """
     Format Japanese text using GiNZA NLP library
@@ -42,21 +192,24 @@ def format_text_with_ginza(text):
     Returns:
         Formatted text with proper paragraphs and punctuation
     """
+    # Text that already carries our paragraph markers was formatted by an
+    # earlier run; formatting it again would only duplicate the markers
+    if _PARAGRAPH_MARKER in text:
+        report_progress(100)
+        return text
+    
+    # Loading GiNZA takes seconds; short or non-Japanese input does not need it
+    if len(text) < _MIN_GINZA_LENGTH or not contains_japanese(text):
+        formatted_text = _light_format(text)
+        report_progress(100)
+        return formatted_text
+    
     # Save the original text for comparison
     original_text = text
     
     # 前処理として文字列に改行を挿入（すでに改行なしで連結されてしまっている文を分解するため）
-    # 日本語の文末記号で分割
-    text = text.replace('。', '。\n')
-    text = text.replace('！', '！\n')
-    text = text.replace('？', '？\n')
-    text = text.replace('?', '?\n')
-    
-    # 疑問文と応答のパターンを検出して分割
-    text = text.replace('ですか?', 'ですか?\n')
-    text = text.replace('ですか？', 'ですか？\n')
-    text = text.replace('のですか?', 'のですか?\n')
-    text = text.replace('のですか？', 'のですか？\n')
+    # 日本語の文末記号で分割（疑問文「ですか？」もここで分割される）
+    text = _SENT_END_INSERT_NL_RE.sub(r'\1\n', text)
     try:
         import spacy
         import ginza
@@ -64,22 +217,24 @@ def format_text_with_ginza(text):
         # Report progress
         report_progress(10)
         
-        # Load the Japanese NLP model
-        try:
-            nlp = spacy.load("ja_ginza")
-        except OSError:
-            # If model not found, try loading with direct path
-            print("Default model not found, trying alternative load method")
-            import ja_ginza
-            nlp = ja_ginza.load()
+        # Load the Japanese NLP model (cached after the first call)
+        nlp = _get_nlp()
         
         report_progress(20)
         
         # Check if text is too large for spaCy's limits (approximately 1MB)
         max_bytes = 40000  # Safe limit for tokenization (under the 49149 bytes limit)
-        text_bytes = text.encode('utf-8')
-        if len(text_bytes) > max_bytes:
-            print(f"Text is too large ({len(text_bytes)} bytes), processing in chunks")
+        # A character takes 1 to 4 bytes in UTF-8, so the text only needs to
+        # be encoded when its length alone doesn't settle the question
+        text_length = len(text)
+        if text_length * 4 <= max_bytes:
+            too_large = False
+        elif text_length > max_bytes:
+            too_large = True
+        else:
+            too_large = len(text.encode('utf-8')) > max_bytes
+        if too_large:
+            print(f"Text is too large ({text_length} characters), processing in chunks", file=sys.stderr)
             # Process text in chunks
             return process_text_in_chunks(text, nlp)
         
@@ -91,70 +246,25 @@ def format_text_with_ginza(text):
         
         report_progress(60)
         
-        # Build formatted text
-        sentences = []
-        paragraphs = []
-        current_paragraph = []
-        
-        # Process each sentence
-        for sent in doc.sents:
-            # Clean the sentence text
-            clean_sent = sent.text.strip()
-            
-            # Skip empty sentences
-            if not clean_sent:
-                continue
-            
-            # Process sentence for formatting
-            clean_sent = clean_up_sentence(clean_sent)
-            
-            # Add to current paragraph
-            current_paragraph.append(clean_sent)
-            
-            # Check if this is a paragraph ending
-            if is_paragraph_break(sent):
-                # Join sentences in paragraph and add to paragraphs list
-                if current_paragraph:
-                    paragraphs.append(" ".join(current_paragraph))
-                    current_paragraph = []
+        # Clean each non-empty sentence and note whether it ends a paragraph
+        sentences = [
+            (clean_up_sentence(sent.text.strip()), is_paragraph_break(sent))
+            for sent in doc.sents
+            if sent.text.strip()
+        ]
         
-        # Add any remaining sentences as a paragraph
-        if current_paragraph:
-            paragraphs.append(" ".join(current_paragraph))
+        # Number each sentence with its paragraph (the count of paragraph
+        # breaks before it) and join each group of sentences in one pass
+        paragraph_ids = accumulate((is_break for _, is_break in sentences), initial=0)
+        paragraphs = [
+            " ".join(sentence for _, (sentence, _) in group)
+            for _, group in groupby(zip(paragraph_ids, sentences), key=itemgetter(0))
+        ]
         
         report_progress(80)
         
         # Format paragraphs for Japanese text
-        formatted_text = ""
-        speaker_pattern = False
-        
-        # Check if text contains speaker indicators
-        import re
-        speaker_regex = re.compile(r'([A-Z\u4e00-\u9faf][A-Za-z\u4e00-\u9faf]*?[\uff1a:])')
-        
-        for i, para in enumerate(paragraphs):
-            # If this looks like a speaker line, format accordingly
-            if speaker_regex.search(para):
-                speaker_pattern = True
-                # Add proper spacing around speaker indicators
-                para = speaker_regex.sub(r'\n\1 ', para).strip()
-                formatted_text += para
-                # Add double line break if not the last paragraph
-                if i < len(paragraphs) - 1:
-                    formatted_text += "\n\n"
-            else:
-                # Standard paragraph formatting
-                if speaker_pattern:
-                    # If previous text had speakers, maintain spacing pattern
-                    if i > 0:
-                        formatted_text += "\n" + para
-                    else:
-                        formatted_text += para
-                else:
-                    # Regular paragraphs with double line breaks
-                    formatted_text += para
-                    if i < len(paragraphs) - 1:
-                        formatted_text += "\n\n"
+        formatted_text = _assemble_paragraphs(paragraphs)
         
         # Final cleanup
         formatted_text = post_process_text(formatted_text)
@@ -162,8 +272,9 @@ def format_text_with_ginza(text):
         report_progress(100)
         
         # Add debug information about the processing
-        print(f"Debug - Original text (first 50 chars): {original_text[:50]}")
-        print(f"Debug - Formatted text (first 50 chars): {formatted_text[:50]}")
+        if _DEBUG:
+            print(f"Debug - Original text (first 50 chars): {original_text[:50]}", file=sys.stderr)
+            print(f"Debug - Formatted text (first 50 chars): {formatted_text[:50]}", file=sys.stderr)
         
         return formatted_text
         
@@ -171,32 +282,39 @@ def format_text_with_ginza(text):
         # Handle import errors more gracefully with proper JSON formatting
         error_msg = "GiNZA or spaCy not installed. Please install with 'pip install ginza spacy'"
         try:
-            print(json.dumps({"success": False, "error": error_msg}))
-            sys.stdout.flush()
+            emit({"success": False, "error": error_msg})
         except BrokenPipeError:
             sys.stderr.write(f"BrokenPipeError: {error_msg}\n")
             sys.stderr.flush()
         return text
 
+def contains_japanese(text):
+    """Check whether the beginning of the text contains Japanese characters"""
+    return _JAPANESE_CHAR_RE.search(text, 0, _LANGUAGE_SAMPLE_LENGTH) is not None
+
+def _light_format(text):
+    """Format text with the regex-based rules only, without GiNZA"""
+    if not text.strip():
+        return text
+    return post_process_text(clean_up_sentence(text))
+
 def clean_up_sentence(sentence):
     """Clean up a sentence with specific Japanese text rules"""
     # Fix common Japanese punctuation
-    sentence = sentence.replace(".", "。").replace(",", "、")
+    sentence = sentence.translate(_PUNCT_TRANS)
     
     # Add period if the sentence doesn't end with any punctuation
-    import re
-    if not re.search(r'[、。！？\.!?]$', sentence.strip()):
+    if not sentence.strip().endswith(_TRAILING_PUNCT):
         sentence = sentence.strip() + "。"
     
     # Fix spacing around Japanese characters
-    sentence = re.sub(r'([、。！？])([^\s])', r'\1 \2', sentence)
+    sentence = _PUNCT_SPACE_RE.sub(r'\1 \2', sentence)
     
     # Fix spacing between Japanese and alphanumeric text
-    sentence = re.sub(r'([a-zA-Z0-9])([^\sa-zA-Z0-9])', r'\1 \2', sentence)
-    sentence = re.sub(r'([^\sa-zA-Z0-9])([a-zA-Z0-9])', r'\1 \2', sentence)
+    sentence = _JP_ALNUM_BOUNDARY_RE.sub(' ', sentence)
     
     # Remove excessive spaces
-    sentence = re.sub(r'\s+', ' ', sentence)
+    sentence = _WHITESPACE_RE.sub(' ', sentence)
     
     return sentence.strip()
 
@@ -206,31 +324,52 @@ def is_paragraph_break(sentence):
     last_token = sentence[-1] if len(sentence) > 0 else None
     
     # Check if the sentence ends with typical paragraph-ending punctuation
-    if last_token and last_token.text in ["。", "！", "？", ".", "!", "?"]:
+    if last_token and last_token.text in _SENTENCE_TERMINATORS:
         # Check for paragraph-ending expressions
-        text = sentence.text.strip()
-        paragraph_endings = [
-            "です。", "ました。", "でした。", "だった。", "である。", "だ。",
-            "だ！", "ですね。", "だろう。", "だろうか。", "ではない。"
-        ]
-        
-        for ending in paragraph_endings:
-            if text.endswith(ending):
-                return True
+        return sentence.text.strip().endswith(_PARAGRAPH_ENDINGS)
     
     return False
 
+def _assemble_paragraphs(paragraphs):
+    """Join paragraphs into the formatted text, laying out speaker lines"""
+    parts = []
+    speaker_pattern = False
+    last_index = len(paragraphs) - 1
+    
+    for i, para in enumerate(paragraphs):
+        # If this looks like a speaker line, format accordingly
+        if _SPEAKER_RE.search(para):
+            speaker_pattern = True
+            # Add proper spacing around speaker indicators
+            para = _SPEAKER_RE.sub(r'\n\1 ', para).strip()
+            parts.append(para)
+            # Add double line break if not the last paragraph
+            if i < last_index:
+                parts.append("\n\n")
+        else:
+            # Standard paragraph formatting
+            if speaker_pattern:
+                # If previous text had speakers, maintain spacing pattern
+                if i > 0:
+                    parts.append("\n")
+                parts.append(para)
+            else:
+                # Regular paragraphs with double line breaks
+                parts.append(para)
+                if i < last_index:
+                    parts.append("\n\n")
+    
+    return "".join(parts)
+
 def process_text_in_chunks(text, nlp):
     """Process long text by breaking it into smaller chunks"""
-    import re
     
     # Define a reasonable chunk size that won't exceed spaCy's limit
     chunk_size = 10000  # characters, not bytes
     
     # Split text into sentences first to avoid breaking in the middle of a sentence
     # Simple regex for Japanese sentence boundaries
-    sentence_boundaries = re.compile(r'([。！？]\s*)')
-    sentences = sentence_boundaries.split(text)
+    sentences = _SENT_SPLIT_RE.split(text)
     
     # Recombine into sentences with their punctuation
     proper_sentences = []
@@ -248,76 +387,72 @@ def process_text_in_chunks(text, nlp):
     processed_chunks = []
     total_chunks = len(proper_sentences)
     
-    # Group sentences into chunks that don't exceed the limit
+    # Group sentences into chunks that don't exceed the limit, keeping a
+    # running byte count so each sentence is encoded only once
     chunks = []
-    current_chunk = ""
+    current_parts = []
+    current_bytes = 0
     
     for sentence in proper_sentences:
+        sentence_bytes = len(sentence.encode('utf-8'))
         # If adding this sentence would exceed the limit, start a new chunk
-        if len((current_chunk + sentence).encode('utf-8')) > 35000:  # Safe margin
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = sentence
+        if current_bytes + sentence_bytes > 35000:  # Safe margin
+            if current_parts:
+                chunks.append("".join(current_parts))
+            current_parts = [sentence]
+            current_bytes = sentence_bytes
         else:
-            current_chunk += sentence
+            current_parts.append(sentence)
+            current_bytes += sentence_bytes
     
     # Add the last chunk if it's not empty
-    if current_chunk:
-        chunks.append(current_chunk)
+    if current_parts:
+        chunks.append("".join(current_parts))
     
-    # Process each chunk
+    # Process the chunks in batches; if a batch fails, process its chunks one
+    # at a time so only the chunk that actually fails falls back to regex
+    # sentence splitting
     total_chunks = len(chunks)
-    for i, chunk in enumerate(chunks):
-        # Update progress
-        progress = 30 + (i / total_chunks) * 30
-        report_progress(int(progress))
-        
-        # Process this chunk
+    batch_size = 8
+    for start in range(0, total_chunks, batch_size):
+        batch = chunks[start:start + batch_size]
         try:
-            doc = nlp(chunk)
-            # Extract sentences and format them
-            chunk_sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
-            processed_text = " ".join(chunk_sentences)
-            processed_chunks.append(processed_text)
-        except Exception as e:
+            docs = list(nlp.pipe(batch, batch_size=batch_size))
+        except Exception:
+            docs = None
+        
+        for i, chunk in enumerate(batch, start):
+            # Update progress
+            progress = 30 + (i / total_chunks) * 30
+            report_progress(int(progress))
+            
             try:
-                print(json.dumps({"progress": {"stage": "formatting", "percent": progress, "error": f"Error processing chunk {i+1}/{total_chunks}: {e}"}})) 
-                sys.stdout.flush()
-            except BrokenPipeError:
-                # Silent catch - we've already configured global signal handler
-                pass
-            # If processing fails, include the raw chunk to avoid data loss
-            processed_chunks.append(chunk)
-    
-    # Combine the processed chunks
-    combined_text = " ".join(processed_chunks)
-    
-    # Apply standard formatting to the combined text
-    # Build formatted text with paragraphs
-    sentences = []
+                doc = docs[i - start] if docs is not None else nlp(chunk)
+                # Keep GiNZA's sentences; they are reused for paragraph building
+                processed_chunks.append([sent.text.strip() for sent in doc.sents if sent.text.strip()])
+            except Exception as e:
+                try:
+                    emit({"progress": {"stage": "formatting", "percent": progress, "error": f"Error processing chunk {i+1}/{total_chunks}: {e}"}})
+                except BrokenPipeError:
+                    # Silent catch - we've already configured global signal handler
+                    pass
+                # If processing fails, include the raw chunk to avoid data loss
+                processed_chunks.append([sent.strip() for sent in _SENTENCE_RE.findall(chunk) if sent.strip()])
+    
+    # Build formatted text with paragraphs from the sentences of every chunk
     paragraphs = []
     current_paragraph = []
     
-    # Re-split into sentences for paragraph formatting
-    # We're simulating doc.sents here since we've already processed in chunks
-    for sent in sentence_boundaries.split(combined_text):
-        if not sent.strip():
-            continue
-            
-        # Clean the sentence text
-        clean_sent = sent.strip()
-        
+    for sent in chain.from_iterable(processed_chunks):
         # Process sentence for formatting
-        clean_sent = clean_up_sentence(clean_sent)
+        clean_sent = clean_up_sentence(sent)
         
         # Add to current paragraph
         current_paragraph.append(clean_sent)
         
-        # Check if this is a paragraph ending
-        if clean_sent.endswith(("。", "！", "？", ".", "!", "?")) and any(clean_sent.endswith(ending) for ending in [
-            "です。", "ました。", "でした。", "だった。", "である。", "だ。",
-            "だ！", "ですね。", "だろう。", "だろうか。", "ではない。"
-        ]):
+        # Check if this is a paragraph ending (every paragraph ending already
+        # ends with a sentence terminator)
+        if clean_sent.endswith(_PARAGRAPH_ENDINGS):
             # Join sentences in paragraph and add to paragraphs list
             if current_paragraph:
                 paragraphs.append(" ".join(current_paragraph))
@@ -328,45 +463,21 @@ def process_text_in_chunks(text, nlp):
         paragraphs.append(" ".join(current_paragraph))
     
     # Format paragraphs for Japanese text following the same logic as before
-    formatted_text = ""
-    speaker_pattern = False
-    
-    # Check if text contains speaker indicators
-    import re
-    speaker_regex = re.compile(r'([A-Z\u4e00-\u9faf][A-Za-z\u4e00-\u9faf]*?[\uff1a:])')
-    
-    for i, para in enumerate(paragraphs):
-        # If this looks like a speaker line, format accordingly
-        if speaker_regex.search(para):
-            speaker_pattern = True
-            # Add proper spacing around speaker indicators
-            para = speaker_regex.sub(r'\n\1 ', para).strip()
-            formatted_text += para
-            # Add double line break if not the last paragraph
-            if i < len(paragraphs) - 1:
-                formatted_text += "\n\n"
-        else:
-            # Standard paragraph formatting
-            if speaker_pattern:
-                # If previous text had speakers, maintain spacing pattern
-                if i > 0:
-                    formatted_text += "\n" + para
-                else:
-                    formatted_text += para
-            else:
-                # Regular paragraphs with double line breaks
-                formatted_text += para
-                if i < len(paragraphs) - 1:
-                    formatted_text += "\n\n"
+    formatted_text = _assemble_paragraphs(paragraphs)
     
     report_progress(80)
     
     # Final cleanup
     return post_process_text(formatted_text)
 
+def _remove_punct_or_unit_space(match):
+    """Replacement for _PUNCT_SPACE_OR_NUMBER_UNIT_RE"""
+    if match.lastindex == 1:
+        return match.group(1)
+    return match.group(2) + match.group(3)
+
 def post_process_text(text):
     """Final post-processing of formatted text"""
-    import re
     
     # Track formatting with metadata instead of adding marker to text
     formatted_with_ginza = True  # Tracking via metadata
@@ -374,36 +485,27 @@ def post_process_text(text):
     # Apply enhanced paragraph breaks using our improved algorithm
     text = apply_enhanced_paragraphs(text)
     
-    # 句読点の前のスペースを削除
-    text = re.sub(r'\s+([、。！？])', r'\1', text)  # 日本語の句読点前のスペースを削除
-    
-    # 数字と単位の間のスペースを削除
-    text = re.sub(r'(\d+)\s*([年月日時分秒円万%％])', r'\1\2', text)
+    # 句読点の前のスペースと、数字と単位の間のスペースを1回の走査で削除
+    text = _PUNCT_SPACE_OR_NUMBER_UNIT_RE.sub(_remove_punct_or_unit_space, text)
     
     # 日本語と英数字の間にスペースを入れる
-    text = re.sub(r'([\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])([a-zA-Z0-9])', r'\1 \2', text)
-    text = re.sub(r'([a-zA-Z0-9])([\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF])', r'\1 \2', text)
+    text = _KANA_ALNUM_BOUNDARY_RE.sub(' ', text)
     
-    # フィラー語を削除
-    filler_words = [
-        "あの", "えーと", "えっと", "まぁ", "あー", "えー", "んー", "そのー"
-    ]
-    for word in filler_words:
-        text = re.sub(f'\\s*{word}\\s*', ' ', text)
+    # フィラー語の削除と連続スペースの整理を1回の走査で行う
+    text = _FILLER_OR_SPACE_RUN_RE.sub(' ', text)
     
-    # 過剰なスペースを整理
-    text = re.sub(r' {2,}', ' ', text)  # 連続スペースを1つに
-    text = re.sub(r'^\s+|\s+$', '', text, flags=re.MULTILINE)  # 行頭・行末のスペース削除
+    # 行頭・行末のスペース削除
+    text = _LINE_EDGE_SPACE_RE.sub('', text)
     
     # 読点の後にスペースを挿入
-    text = re.sub(r'([、,])([^\s\n])', r'\1 \2', text)
+    text = _COMMA_SPACE_RE.sub(r'\1 \2', text)
     
     # 各行が句点で終わるように調整する（最終処理）
     lines = []
     for paragraph in text.split('\n\n'):
             
         # Add period to paragraph if it doesn't end with punctuation
-        if paragraph and not re.search(r'[。！？.!?]$', paragraph.strip()):
+        if paragraph and not _SENTENCE_END_RE.search(paragraph.strip()):
             paragraph = paragraph.strip() + '。'
         
         lines.append(paragraph)
@@ -411,47 +513,40 @@ def post_process_text(text):
     text = '\n\n'.join(lines)
     
     # Debug paragraph preservation
-    newline_count = text.count("\n\n")
-    sys.stderr.write(f"Debug - Final output has {newline_count} paragraph breaks\n")
-    sys.stderr.flush()
+    if _DEBUG:
+        newline_count = text.count("\n\n")
+        sys.stderr.write(f"Debug - Final output has {newline_count} paragraph breaks\n")
+        sys.stderr.flush()
     
     return text.strip()
 
 def apply_enhanced_paragraphs(text):
     """Apply enhanced paragraph breaks to the formatted text"""
-    import re
-    import sys
     
-    sys.stderr.write(f"Debug - Applying enhanced paragraph breaks to text ({len(text)} chars)\n")
-    sys.stderr.flush()
+    if _DEBUG:
+        sys.stderr.write(f"Debug - Applying enhanced paragraph breaks to text ({len(text)} chars)\n")
+        sys.stderr.flush()
     
     # No need to preserve GiNZA formatting marker as we don't add it anymore
     ginza_marker = ""
     
-    # Split text by sentences first
-    sentences = []
-    pattern = r'([^。！？!?]+[。！？!?])'
-    matches = re.finditer(pattern, text)
+    # Split text by sentences first, including any trailing text that
+    # doesn't end with a sentence marker
+    sentences = [s for s in map(str.strip, _SENTENCE_RE.findall(text)) if s]
     
-    last_end = 0
-    for match in matches:
-        sentences.append(match.group(0).strip())
-        last_end = match.end()
+    # With fewer than two sentences there is no break to place
+    if len(sentences) < 2:
+        return _EXCESS_NEWLINES_RE.sub('\n\n', sentences[0]) if sentences else ""
     
-    # Add any remaining text that doesn't end with a sentence marker
-    if last_end < len(text):
-        sentences.append(text[last_end:].strip())
-    
-    sys.stderr.write(f"Debug - Split text into {len(sentences)} sentences\n")
-    sys.stderr.flush()
+    if _DEBUG:
+        sys.stderr.write(f"Debug - Split text into {len(sentences)} sentences\n")
+        sys.stderr.flush()
     
     # Group sentences into paragraphs
     paragraphs = []
     current_paragraph = []
-    dialogue_markers = ['ですか', 'でしょうか', 'わかりました', 'はい', 'いいえ', 'そうですね', 'なるほど',
-                      'ありがとう', 'えー', 'ええ', 'さようなら', '確かに', '失礼', 'そうなんですか']
-    topic_shift_markers = ['でも', 'しかし', 'ところで', 'また', 'そして', 'そういえば', '次に', 'ただ', 'まずは']
-    
+    lengths = [len(sentence) for sentence in sentences]
+    last_index = len(sentences) - 1
     for i, sentence in enumerate(sentences):
         current_paragraph.append(sentence)
         
@@ -459,38 +554,31 @@ def apply_enhanced_paragraphs(text):
         end_paragraph = False
         
         # End paragraph on dialogue markers or topic shifts
-        if i < len(sentences) - 1:  # If not the last sentence
-            next_sentence = sentences[i+1]
-            break_reason = ""
+        if i < last_index:  # If not the last sentence
+            current_length = lengths[i]
+            next_length = lengths[i+1]
             
-            # Check if next sentence starts with dialogue/topic marker
-            for marker in dialogue_markers + topic_shift_markers:
-                if next_sentence.startswith(marker):
-                    end_paragraph = True
-                    break_reason = f"Dialogue marker: {marker}"
-                    break
-                    
-            # Check if this sentence is a question
-            if not end_paragraph and (sentence.endswith('?') or sentence.endswith('？')):
-                end_paragraph = True
-                break_reason = "Question ending"
+            # One search finds either a dialogue/topic marker at the start of
+            # the next sentence or a speaker change anywhere in it
+            next_break = _PARAGRAPH_BREAK_RE.search(sentences[i+1])
             
-            # Check if sentences have very different lengths (indicating topic change)
-            if not end_paragraph:
-                current_length = len(sentence)
-                next_length = len(next_sentence)
-                if abs(current_length - next_length) > 20 and current_length > 15:
-                    end_paragraph = True
-                    break_reason = f"Length difference: {current_length} vs {next_length}"
+            end_paragraph = bool(
+                next_break
+                # This sentence is a question
+                or sentence.endswith(('?', '？'))
+                # Very different lengths indicate a topic change
+                or (abs(current_length - next_length) > 20 and current_length > 15)
+            )
             
-            # Speaker change detection
-            if not end_paragraph:
-                speaker_pattern = r'([A-Z\u4e00-\u9faf][A-Za-z\u4e00-\u9faf]*?[：:]\s)'
-                if re.search(speaker_pattern, next_sentence):
-                    end_paragraph = True
+            if end_paragraph and _DEBUG:
+                if next_break and next_break.lastgroup == "marker":
+                    break_reason = f"Dialogue marker: {next_break.group()}"
+                elif sentence.endswith(('?', '？')):
+                    break_reason = "Question ending"
+                elif abs(current_length - next_length) > 20 and current_length > 15:
+                    break_reason = f"Length difference: {current_length} vs {next_length}"
+                else:
                     break_reason = "Speaker change detected"
-                    
-            if end_paragraph:
                 sys.stderr.write(f"Debug - Paragraph break after: '{sentence[:20]}...' - Reason: {break_reason}\n")
                 sys.stderr.flush()
         
@@ -502,24 +590,27 @@ def apply_enhanced_paragraphs(text):
                 current_paragraph = []
     
     # Log paragraph info
-    paragraph_count = len(paragraphs)
-    sys.stderr.write(f"Debug - Created {paragraph_count} paragraphs\n")
-    sys.stderr.flush()
+    if _DEBUG:
+        paragraph_count = len(paragraphs)
+        sys.stderr.write(f"Debug - Created {paragraph_count} paragraphs\n")
+        sys.stderr.flush()
     
     # Build the final formatted text with explicit paragraph marks
-    formatted_text = "\n\n◆◆◆\n\n".join(paragraphs)
+    formatted_text = f"\n\n{_PARAGRAPH_MARKER}\n\n".join(paragraphs)
     
     # Log the formatted text with paragraph markers
-    sys.stderr.write(f"Debug - Added visible paragraph markers '◆◆◆'\n")
-    sys.stderr.flush()
+    if _DEBUG:
+        sys.stderr.write(f"Debug - Added visible paragraph markers '{_PARAGRAPH_MARKER}'\n")
+        sys.stderr.flush()
     
     # Final formatting cleanup
-    formatted_text = re.sub(r'\n{3,}', '\n\n', formatted_text)  # Normalize newlines
+    formatted_text = _EXCESS_NEWLINES_RE.sub('\n\n', formatted_text)  # Normalize newlines
     
     # Debug the output
-    newlines_count = formatted_text.count("\n\n")
-    sys.stderr.write(f"Debug - Final text has {newlines_count} paragraph breaks\n")
-    sys.stderr.flush()
+    if _DEBUG:
+        newlines_count = formatted_text.count("\n\n")
+        sys.stderr.write(f"Debug - Final text has {newlines_count} paragraph breaks\n")
+        sys.stderr.flush()
     
     return formatted_text
 
@@ -531,15 +622,18 @@ def main():
     
     args = parser.parse_args()
     
+    if args.debug:
+        global _DEBUG
+        _DEBUG = True
+    
     try:
         # Get the text content
         if args.is_file:
             if not os.path.isfile(args.input):
-                print(json.dumps({"success": False, "error": f"Input file not found: {args.input}"}))
+                emit({"success": False, "error": f"Input file not found: {args.input}"})
                 return
                 
-            with open(args.input, 'r', encoding='utf-8') as f:
-                text = f.read()
+            text = Path(args.input).read_text(encoding='utf-8')
         else:
             text = args.input
             
@@ -549,24 +643,26 @@ def main():
         if args.debug:
             # Debug view with visible newlines
             debug_text = formatted_text.replace('\n', '↵\n')
-            print(f"Debug formatted text with visible newlines:\n{debug_text}")
+            print(f"Debug formatted text with visible newlines:\n{debug_text}", file=sys.stderr)
         
         try:
             # Debug print to see raw formatted text with escape sequences
-            raw_text = repr(formatted_text)
-            sys.stderr.write(f"Debug - Raw formatted text: {raw_text[:100]}...\n")
-            sys.stderr.flush()
+            if _DEBUG:
+                raw_text = repr(formatted_text[:100])
+                sys.stderr.write(f"Debug - Raw formatted text: {raw_text[:100]}...\n")
+                sys.stderr.flush()
             
-            # Return the result preserving line breaks and add metadata
-            result = json.dumps({
-                "success": True, 
-                "result": formatted_text,
-                "metadata": {
-                    "formatted_with_ginza": True
-                }
-            })
-            print(result)
-            sys.stdout.flush()
+            # Return the result preserving line breaks and add metadata. The
+            # envelope is written around the encoded text rather than encoding
+            # a dict, so no extra copies of a large transcript are made. The
+            # text is encoded before anything is written, so an encoding error
+            # cannot leave a partial message on stdout.
+            payload = _encode(formatted_text)
+            out = sys.stdout.buffer
+            out.write(b'{"success":true,"result":')
+            out.write(payload)
+            out.write(b',"metadata":{"formatted_with_ginza":true}}\n')
+            out.flush()
         except BrokenPipeError:
             # Handle broken pipe when parent process has closed the connection
             sys.stderr.write("BrokenPipeError: Unable to write result to parent process\n")
@@ -576,8 +672,7 @@ def main():
         
     except Exception as e:
         try:
-            print(json.dumps({"success": False, "error": str(e)}))
-            sys.stdout.flush()
+            emit({"success": False, "error": str(e)})
         except BrokenPipeError:
             sys.stderr.write(f"BrokenPipeError while reporting error: {str(e)}\n")
             sys.stderr.flush()
@@ -12,8 +12,24 @@ import json
 import time
 import argparse
 import importlib.util
+from pathlib import Path
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+    
+    def _encode(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def _encode(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def emit(result: Dict[str, Any]) -> None:
+    """結果のJSONをUTF-8のまま1回の書き込みで標準出力に送る"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(_encode(result) + b"\n")
+    sys.stdout.buffer.flush()
+
 # Strands AgentのインポートとAWS認証情報をチェック
 def check_strands_availability():
     """Strands Agent利用可能か確認する"""
@@ -134,15 +150,14 @@ def main():
         # テキストの読み込み
         if args.file:
             try:
-                with open(args.file, 'r', encoding='utf-8') as f:
-                    text = f.read()
+                text = Path(args.file).read_text(encoding='utf-8')
             except Exception as e:
                 sys.stderr.write(f"ファイルの読み込み中にエラーが発生しました: {str(e)}\n")
                 result = {
                     "error": True,
                     "message": f"ファイル読み込みエラー: {str(e)}"
                 }
-                print(json.dumps(result, ensure_ascii=False))
+                emit(result)
                 sys.exit(1)
         else:
             text = args.text
@@ -157,7 +172,7 @@ def main():
             timeout=args.timeout
         )
         
-        print(json.dumps(result, ensure_ascii=False))
+        emit(result)
         
     except ImportError as e:
         # Strandsがインストールされていない場合のエラーを表示
@@ -168,7 +183,7 @@ def main():
             "success": False,
             "error": f"Strands Agentsがインストールされていません: {str(e)}"
         }
-        print(json.dumps(error_result, ensure_ascii=False))
+        emit(error_result)
         sys.stderr.write(f"\n{str(e)}\n\nインストールするには: pip install strands-agents\n注意: Python 3.10以上が必要です\n")
         sys.exit(1)
         
@@ -181,7 +196,7 @@ def main():
             "success": False,
             "error": f"エラーが発生しました: {str(e)}"
         }
-        print(json.dumps(error_result, ensure_ascii=False))
+        emit(error_result)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -2,14 +2,34 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import json
 import time
+import shutil
 import tempfile
 import argparse
+import threading
 import importlib
+import importlib.util
+import inspect
 from pathlib import Path
 
+try:
+    import orjson
+    
+    def _encode(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def _encode(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def emit(message):
+    """Send one newline-terminated JSON message to the parent with a single write"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(_encode(message) + b"\n")
+    sys.stdout.buffer.flush()
+
 def report_progress(progress, stage="transcription", estimated_time_remaining=None):
     """Report progress to the parent process"""
     data = {
@@ -20,9 +40,7 @@ def report_progress(progress, stage="transcription", estimated_time_remaining=No
     if estimated_time_remaining is not None:
         data["estimatedTimeRemaining"] = estimated_time_remaining
     
-    # Make sure to add a newline to separate JSON objects
-    print(json.dumps({"progress": data}))
-    print(flush=True)  # Ensure output is flushed with a newline
+    emit({"progress": data})
 
 class ProgressCallback:
     """Callback for reporting transcription progress"""
@@ -49,6 +67,31 @@ class ProgressCallback:
                 
                 report_progress(percent, estimated_time_remaining=estimated_remaining)
 
+# Anything post_process_japanese_text would change: ASCII punctuation and
+# alphanumerics, spaces before Japanese punctuation, and sentence endings
+_JP_NEEDS_FIX = re.compile(r'[.,a-zA-Z0-9]| [。、！？]|(?:です|ました)。')
+
+# Fixed-string fixes applied in one pass: sentence endings that start a new
+# line, spaces dropped before Japanese punctuation, and ASCII punctuation
+# mapped to its Japanese form. Longer keys are tried first.
+_JP_FIX_TABLE = {
+    "です。": "です。\n",
+    "ました。": "ました。\n",
+    " 。": "。",
+    " 、": "、",
+    " ！": "！",
+    " ？": "？",
+    ".": "。",
+    ",": "、",
+}
+_JP_FIX_RE = re.compile("|".join(map(re.escape, sorted(_JP_FIX_TABLE, key=len, reverse=True))))
+
+# Alphanumeric/Japanese boundaries in either order, where a space is inserted
+_RE_ALNUM_JP_BOUNDARY = re.compile(
+    r'(?<=[a-zA-Z0-9])(?=[\u3040-\u30ff\u4e00-\u9fff])'
+    r'|(?<=[\u3040-\u30ff\u4e00-\u9fff])(?=[a-zA-Z0-9])'
+)
+
 def post_process_japanese_text(text):
     """Apply Japanese-specific post-processing to improve text quality"""
     # Fix common Japanese transcription issues
@@ -57,29 +100,66 @@ def post_process_japanese_text(text):
     # Remove excessive whitespace while preserving paragraph structure
     processed_text = processed_text.strip()
     
-    # Fix common Whisper transcription errors in Japanese
-    processed_text = processed_text.replace("です。", "です。\n")
-    processed_text = processed_text.replace("ました。", "ました。\n")
-    
-    # Fix Japanese punctuation spacing
-    processed_text = processed_text.replace(" 。", "。")
-    processed_text = processed_text.replace(" 、", "、")
-    processed_text = processed_text.replace(" ！", "！")
-    processed_text = processed_text.replace(" ？", "？")
+    # Purely Japanese text with nothing below to fix is returned as is
+    if not _JP_NEEDS_FIX.search(processed_text):
+        return processed_text
     
-    # Fix common period mistakes
-    processed_text = processed_text.replace(".", "。")
-    processed_text = processed_text.replace(",", "、")
+    # Fix common Whisper transcription errors, Japanese punctuation spacing
+    # and period mistakes
+    processed_text = _JP_FIX_RE.sub(lambda match: _JP_FIX_TABLE[match.group()], processed_text)
     
     # Fix spacing between alphanumeric and Japanese
-    import re
-    processed_text = re.sub(r'([a-zA-Z0-9])([\u3040-\u30ff\u4e00-\u9fff])', r'\1 \2', processed_text)
-    processed_text = re.sub(r'([\u3040-\u30ff\u4e00-\u9fff])([a-zA-Z0-9])', r'\1 \2', processed_text)
+    processed_text = _RE_ALNUM_JP_BOUNDARY.sub(' ', processed_text)
     
     return processed_text
 
-def transcribe_with_faster_whisper(audio_path, model_size="small", language=None):
-    """Transcribe audio with faster-whisper"""
+# Loaded models keyed by (backend, model), kept for the life of the process so
+# that --serve mode only loads each model once
+_MODEL_CACHE = {}
+
+def get_cached_model(key, load):
+    """Return the model cached under key, loading it with load() on first use"""
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        model = _MODEL_CACHE[key] = load()
+    return model
+
+def select_device_and_compute_type():
+    """
+    Pick the device and fastest compute type CTranslate2 supports here
+    
+    - CUDA with INT8 tensor cores (compute capability 7.5+): int8_float16
+    - Other CUDA GPUs: float16 (int8_float16 fails without INT8 tensor cores)
+    - CPU: int8
+    """
+    import ctranslate2
+    
+    if ctranslate2.get_cuda_device_count() > 0:
+        supported = ctranslate2.get_supported_compute_types("cuda")
+        return "cuda", "int8_float16" if "int8_float16" in supported else "float16"
+    return "cpu", "int8"
+
+# Whether a model class's transcribe() accepts a progress callback, probed
+# once per class
+_TRANSCRIBE_HAS_CALLBACK = {}
+
+def transcribe_accepts_callback(model):
+    """Check if the model's transcribe method accepts a callback parameter"""
+    cls = type(model)
+    has_callback = _TRANSCRIBE_HAS_CALLBACK.get(cls)
+    if has_callback is None:
+        has_callback = "callback" in inspect.signature(cls.transcribe).parameters
+        _TRANSCRIBE_HAS_CALLBACK[cls] = has_callback
+    return has_callback
+
+def transcribe_with_faster_whisper(audio_path, model_size="small", language=None, beam_size=1, best_of=1,
+                                   without_timestamps=False, local_files_only=False):
+    """
+    Transcribe audio with faster-whisper
+    
+    With local_files_only, the converted model must already be in the Hugging
+    Face cache; it is not downloaded.
+    """
     try:
         from faster_whisper import WhisperModel
         
@@ -89,54 +169,53 @@ def transcribe_with_faster_whisper(audio_path, model_size="small", language=None
         
         # Initialize the model
         report_progress(5)  # Report initial progress
-        model = WhisperModel(model_size, device="auto", compute_type="auto")
+        device, compute_type = select_device_and_compute_type()
+        model = get_cached_model(
+            ("faster-whisper", model_size),
+            lambda: WhisperModel(model_size, device=device, compute_type=compute_type,
+                                 local_files_only=local_files_only)
+        )
         report_progress(10)  # Model loaded
         
         # Create callback for progress reporting
         progress_callback = ProgressCallback()
         
         # Start transcription
-        # Check if the model's transcribe method accepts callback parameter
-        import inspect
-        transcribe_params = inspect.signature(model.transcribe).parameters
+        options = {
+            "language": language or "ja",  # Default to Japanese if not specified
+            "task": "transcribe",
+            "beam_size": beam_size,
+            "best_of": best_of,
+            "vad_filter": True,
+            # Don't prompt each window with the previous window's text, which
+            # lengthens every decode and can make repetitions snowball
+            "condition_on_previous_text": False,
+            "without_timestamps": without_timestamps,
+        }
         
-        if 'callback' in transcribe_params:
+        if transcribe_accepts_callback(model):
             # Method supports callback
-            segments, info = model.transcribe(
-                audio_path,
-                language=language or "ja",  # Default to Japanese if not specified
-                task="transcribe",
-                beam_size=5,
-                vad_filter=True,
-                callback=progress_callback
-            )
+            segments, info = model.transcribe(audio_path, callback=progress_callback, **options)
         else:
             # Method doesn't support callback, use without it
-            segments, info = model.transcribe(
-                audio_path,
-                language=language or "ja",  # Default to Japanese if not specified
-                task="transcribe",
-                beam_size=5,
-                vad_filter=True
-            )
+            segments, info = model.transcribe(audio_path, **options)
             # Report some progress points manually
             report_progress(50)
         
-        # Convert segments to list for JSON serialization
-        result_segments = []
-        text = ""
-        
+        # Send each segment to the parent as soon as it is decoded (consuming
+        # the generator is where decoding actually happens); only the text is
+        # kept here for the full transcript
+        text_parts = []
         for segment in segments:
-            # Apply post-processing to segment text
-            processed_segment_text = segment.text
-            
-            result_segments.append({
+            emit({"segment": {
                 "start": segment.start,
                 "end": segment.end,
-                "text": processed_segment_text,
+                "text": segment.text,
                 "confidence": float(segment.avg_logprob)
-            })
-            text += processed_segment_text + " "
+            }})
+            text_parts.append(segment.text)
+        
+        text = " ".join(text_parts)
         
         # Apply post-processing to full text if Japanese
         if info.language == "ja" or language == "ja":
@@ -145,9 +224,9 @@ def transcribe_with_faster_whisper(audio_path, model_size="small", language=None
         # Report completion
         report_progress(100)
         
+        # Segments were already streamed, so the result carries none
         return {
             "text": text.strip(),
-            "segments": result_segments,
             "language": info.language,
             "language_probability": float(info.language_probability)
         }
@@ -155,24 +234,54 @@ def transcribe_with_faster_whisper(audio_path, model_size="small", language=None
     except ImportError:
         raise ImportError("faster-whisper not installed. Please install it with 'pip install faster-whisper'.")
 
-def transcribe_with_openai_whisper(audio_path, model_name="large-v3-turbo", language=None):
+def _progress_ticker(stop_event, start=20, step=5, limit=90, interval=2.0):
+    """Report increasing progress every interval seconds until stop_event is set"""
+    progress = start
+    report_progress(progress)
+    while not stop_event.wait(interval):
+        progress = min(progress + step, limit)
+        report_progress(progress)
+
+# Longest audio whose log-mel spectrogram is computed on the GPU
+GPU_MEL_MAX_SECONDS = 30 * 60
+
+def transcribe_with_openai_whisper(audio_path, model_name="large-v3-turbo", language=None, beam_size=1, best_of=1,
+                                   without_timestamps=False):
     """Transcribe audio with OpenAI Whisper"""
     try:
+        import torch
         import whisper
         
         # Initialize the model
         report_progress(5)  # Report initial progress
-        model = whisper.load_model(model_name)
+        model = get_cached_model(("openai-whisper", model_name), lambda: whisper.load_model(model_name))
         report_progress(15)  # Model loaded
         
+        on_gpu = model.device.type == "cuda"
+        if on_gpu:
+            # Let the remaining float32 matmuls and convolutions use TF32
+            # tensor cores
+            torch.set_float32_matmul_precision("high")
+            torch.backends.cudnn.allow_tf32 = True
+        
         # Start transcription
         options = {
-            # Set higher values for better sentence punctuation
-            "best_of": 5,
+            # Candidates sampled when falling back to a non-zero temperature
+            "best_of": best_of,
             # Set temperature for more predictable output
             "temperature": 0,
+            # Decode in half precision on the GPU (not supported on CPU)
+            "fp16": on_gpu,
+            # Don't prompt each window with the previous window's text
+            "condition_on_previous_text": False,
+            "without_timestamps": without_timestamps,
         }
         
+        # Beam search only when asked for; a single beam is plain greedy
+        # decoding, which Whisper does without the beam search decoder
+        if beam_size > 1:
+            options["beam_size"] = beam_size
+        
         # Note: vad_filter is not supported in OpenAI Whisper, only in faster-whisper
         
         # Set language if provided, default to Japanese if not specified
@@ -181,26 +290,31 @@ def transcribe_with_openai_whisper(audio_path, model_name="large-v3-turbo", lang
         else:
             options["language"] = "ja"
         
-        # Set up a progress tracker by overriding decode_with_fallback
-        original_decode = model.decode
-        
-        def decode_with_progress(*args, **kwargs):
-            """Wrap the decoder to track progress"""
-            # Report progress at fixed intervals
-            for progress in range(20, 90, 10):
-                report_progress(progress)
-                result = original_decode(*args, **kwargs)
-                time.sleep(0.1)  # To ensure progress updates are visible
-                return result
+        # OpenAI Whisper has no progress callback, so report steady progress
+        # from a background thread while transcription runs
+        stop_event = threading.Event()
+        ticker = threading.Thread(target=_progress_ticker, args=(stop_event,), daemon=True)
+        ticker.start()
         
-        # Temporarily replace the decode function
-        model.decode = decode_with_progress
+        # On a GPU, hand transcribe() the decoded audio as a device tensor so
+        # that its log-mel spectrogram (STFT) is computed on the GPU as well;
+        # a precomputed mel cannot be passed because transcribe() always
+        # derives the (padded) mel from the audio itself. The whole file's
+        # STFT is built at once, so long recordings stay on the CPU path
+        # rather than competing with the model for VRAM.
+        audio = audio_path
+        if on_gpu:
+            audio = whisper.load_audio(audio_path)
+            if len(audio) <= GPU_MEL_MAX_SECONDS * whisper.audio.SAMPLE_RATE:
+                audio = torch.from_numpy(audio).to(model.device)
         
         # Perform transcription
-        result = model.transcribe(audio_path, **options)
-        
-        # Restore original function
-        model.decode = original_decode
+        try:
+            with torch.inference_mode():
+                result = model.transcribe(audio, **options)
+        finally:
+            stop_event.set()
+            ticker.join()
         
         # Convert segments to the common format
         segments = []
@@ -235,43 +349,348 @@ def transcribe_with_openai_whisper(audio_path, model_name="large-v3-turbo", lang
     except ImportError:
         raise ImportError("OpenAI Whisper not installed. Please install it with 'pip install openai-whisper'.")
 
-def main():
-    parser = argparse.ArgumentParser(description="Transcribe audio using Whisper")
-    parser.add_argument("input", help="Input audio file")
-    parser.add_argument("--model", help="Model to use", 
-                       choices=["faster-whisper-small", "faster-whisper-medium", "openai-whisper-large-v3-turbo"],
-                       default="faster-whisper-small")
-    parser.add_argument("--language", help="Language code (optional)", default=None)
+def transcribe_with_trt_whisper(audio_path, engine_dir, model_name="large-v3", language=None):
+    """
+    Transcribe audio with a TensorRT-LLM Whisper engine
     
-    args = parser.parse_args()
+    The encoder and decoder engines must be built beforehand with the
+    TensorRT-LLM Whisper example (float16, GEMM and BERT attention plugins).
+    Audio is decoded in 30-second windows, one segment per window.
+    """
+    try:
+        import torch
+        import whisper
+        from tensorrt_llm.runtime import ModelRunnerCpp
+    except ImportError:
+        raise ImportError("TensorRT-LLM not installed. Please install it with 'pip install tensorrt_llm openai-whisper'.")
+    
+    if not engine_dir or not os.path.isdir(engine_dir):
+        raise FileNotFoundError(f"TensorRT-LLM Whisper engine directory not found: {engine_dir}")
+    
+    # Load the engines
+    report_progress(5)  # Report initial progress
+    runner = get_cached_model(
+        ("trt-whisper", engine_dir),
+        lambda: ModelRunnerCpp.from_dir(engine_dir=engine_dir, is_enc_dec=True)
+    )
+    report_progress(10)  # Model loaded
+    
+    language = language or "ja"  # Default to Japanese if not specified
+    tokenizer = whisper.tokenizer.get_tokenizer(
+        multilingual=True,
+        num_languages=100 if model_name.startswith("large-v3") else 99,
+        language=language,
+        task="transcribe"
+    )
+    prompt_ids = torch.tensor(tokenizer.sot_sequence_including_notimestamps, dtype=torch.int32)
+    n_mels = 128 if model_name.startswith("large-v3") else 80
+    
+    audio = whisper.load_audio(audio_path)
+    window = whisper.audio.N_SAMPLES
+    total_windows = max((len(audio) + window - 1) // window, 1)
+    
+    result_segments = []
+    progress_callback = ProgressCallback()
+    
+    for index in range(total_windows):
+        start = index * window
+        samples = whisper.pad_or_trim(audio[start:start + window])
+        mel = whisper.log_mel_spectrogram(samples, n_mels=n_mels).to("cuda", dtype=torch.float16)
+        
+        outputs = runner.generate(
+            batch_input_ids=[prompt_ids],
+            encoder_input_features=[mel.transpose(0, 1)],
+            encoder_output_lengths=[mel.shape[1] // 2],
+            # Whisper's own per-window limit (n_text_ctx // 2); 30 seconds of
+            # Japanese speech often needs well over 100 tokens
+            max_new_tokens=224,
+            end_id=tokenizer.eot,
+            pad_id=tokenizer.eot,
+            num_beams=1
+        )
+        token_ids = outputs[0][0].tolist()[len(prompt_ids):]
+        segment_text = tokenizer.decode([t for t in token_ids if t < tokenizer.eot]).strip()
+        
+        if segment_text:
+            result_segments.append({
+                "start": start / whisper.audio.SAMPLE_RATE,
+                "end": min(start + window, len(audio)) / whisper.audio.SAMPLE_RATE,
+                "text": segment_text,
+                "confidence": 0.0
+            })
+        
+        progress_callback({"task": "transcribe", "completed_steps": index + 1, "total_steps": total_windows})
     
+    text = " ".join(segment["text"] for segment in result_segments)
+    
+    # Apply post-processing to full text if Japanese
+    if language == "ja":
+        text = post_process_japanese_text(text)
+    
+    # Report completion
+    report_progress(100)
+    
+    return {
+        "text": text.strip(),
+        "segments": result_segments,
+        "language": language
+    }
+
+def transcribe_with_onnx_whisper(audio_path, model_name="large-v3-turbo", language=None):
+    """
+    Transcribe audio with ONNX Runtime on CUDA using I/O binding
+    
+    With I/O binding the encoder output, KV cache and logits stay in device
+    memory between the encoder and decoder runs instead of being copied
+    through host memory on every step.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        from transformers import AutoProcessor, pipeline
+    except ImportError:
+        raise ImportError("ONNX Runtime Whisper not installed. Please install it with 'pip install optimum[onnxruntime-gpu]'.")
+    
+    model_id = f"openai/whisper-{model_name}"
+    # The PyTorch to ONNX export takes minutes, so it is done once and the
+    # exported model is kept next to the OpenAI Whisper checkpoints
+    export_dir = os.path.join(os.path.expanduser("~"), ".cache", "whisper", "onnx", model_name)
+    
+    # Load (and on first use export) the model
+    report_progress(5)  # Report initial progress
+    
+    def export_model():
+        print(f"Exporting {model_id} to ONNX in {export_dir}...", file=sys.stderr)
+        os.makedirs(os.path.dirname(export_dir), exist_ok=True)
+        # Export into a temporary directory and rename it into place, so an
+        # interrupted export is never mistaken for a finished one
+        staging_dir = tempfile.mkdtemp(prefix=f".{model_name}-", dir=os.path.dirname(export_dir))
+        try:
+            model = ORTModelForSpeechSeq2Seq.from_pretrained(model_id, export=True)
+            model.save_pretrained(staging_dir)
+            AutoProcessor.from_pretrained(model_id).save_pretrained(staging_dir)
+            os.replace(staging_dir, export_dir)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+    
+    def load_recognizer():
+        if not os.path.isfile(os.path.join(export_dir, "config.json")):
+            export_model()
+        processor = AutoProcessor.from_pretrained(export_dir)
+        model = ORTModelForSpeechSeq2Seq.from_pretrained(
+            export_dir,
+            export=False,
+            provider="CUDAExecutionProvider",
+            use_io_binding=True
+        )
+        return pipeline(
+            "automatic-speech-recognition",
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            chunk_length_s=30,
+            device="cuda:0"
+        )
+    
+    recognizer = get_cached_model(("onnx-whisper", model_id), load_recognizer)
+    report_progress(15)  # Model loaded
+    
+    language = language or "ja"  # Default to Japanese if not specified
+    result = recognizer(
+        audio_path,
+        return_timestamps=True,
+        generate_kwargs={"language": language, "task": "transcribe"}
+    )
+    report_progress(90)
+    
+    # Convert chunks to the common format
+    segments = []
+    for chunk in result.get("chunks", []):
+        start, end = chunk["timestamp"]
+        segments.append({
+            "start": start,
+            "end": end if end is not None else start,
+            "text": chunk["text"],
+            "confidence": 0.0
+        })
+    
+    # Apply post-processing to full text if Japanese
+    text = result["text"]
+    if language == "ja":
+        text = post_process_japanese_text(text)
+    
+    # Report completion
+    report_progress(100)
+    
+    return {
+        "text": text.strip(),
+        "segments": segments,
+        "language": language
+    }
+
+def transcribe_with_ctranslate2_or_openai_whisper(audio_path, model_name="large-v3-turbo", language=None,
+                                                  beam_size=1, best_of=1, without_timestamps=False):
+    """
+    Transcribe an OpenAI Whisper model through faster-whisper when possible
+    
+    faster-whisper runs the same weights converted for CTranslate2, whose
+    decoder avoids the per-token Python and kernel launch overhead of the
+    PyTorch implementation. The converted model is only used when it has
+    already been downloaded; otherwise, or when faster-whisper is not
+    installed or cannot load it, OpenAI Whisper runs its own checkpoint.
+    """
+    if importlib.util.find_spec("faster_whisper") is not None:
+        try:
+            return transcribe_with_faster_whisper(audio_path, model_name, language, beam_size, best_of,
+                                                  without_timestamps, local_files_only=True)
+        except Exception as e:
+            print(f"faster-whisper could not run {model_name}, falling back to OpenAI Whisper: {e}", file=sys.stderr)
+    
+    return transcribe_with_openai_whisper(audio_path, model_name, language, beam_size, best_of, without_timestamps)
+
+# Modules each model family imports
+_BACKEND_MODULES = {
+    "faster-whisper": ["faster_whisper"],
+    "openai-whisper": ["faster_whisper"],
+    "trt-whisper": ["tensorrt_llm", "whisper"],
+    "onnx-whisper": ["optimum.onnxruntime", "transformers"],
+}
+
+# Modules imported instead when a family's first module is not installed
+_BACKEND_FALLBACK_MODULES = {
+    "openai-whisper": ["whisper"],
+}
+
+def preload_backend(model):
+    """
+    Import the backend modules for model up front
+    
+    Their torch import takes seconds; doing it at startup keeps it out of the
+    first request and away from the progress thread. Modules that fail to
+    import are skipped here and reported by the transcription function itself.
+    """
+    family = "-".join(model.split("-")[:2])
+    module_names = _BACKEND_MODULES.get(family, [])
+    # OpenAI Whisper (and its torch import) is only needed when faster-whisper
+    # is missing; when faster-whisper fails it is imported on demand
+    if family in _BACKEND_FALLBACK_MODULES and importlib.util.find_spec(module_names[0]) is None:
+        module_names = _BACKEND_FALLBACK_MODULES[family]
+    for module_name in module_names:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            continue
+
+MODEL_CHOICES = [
+    "faster-whisper-small", "faster-whisper-medium", "openai-whisper-large-v3-turbo",
+    "trt-whisper-large-v3", "onnx-whisper-large-v3-turbo"
+]
+
+def transcribe_file(input_path, model, language=None, engine_dir=None, beam_size=1, best_of=1,
+                    without_timestamps=False):
+    """
+    Transcribe one audio file and return the message sent to the parent
+    
+    Returns:
+        {"success": True, "result": ...} or {"success": False, "error": ...}
+    """
     # Check if input file exists
-    if not os.path.isfile(args.input):
-        print(json.dumps({"success": False, "error": f"Input file not found: {args.input}"}))
-        return
+    if not os.path.isfile(input_path):
+        return {"success": False, "error": f"Input file not found: {input_path}"}
     
     try:
         start_time = time.time()
         result = None
         
-        if args.model.startswith("faster-whisper"):
-            model_size = args.model.split("-")[-1]
-            result = transcribe_with_faster_whisper(args.input, model_size, args.language)
-        elif args.model.startswith("openai-whisper"):
-            model_name = "-".join(args.model.split("-")[2:])
-            result = transcribe_with_openai_whisper(args.input, model_name, args.language)
+        if model.startswith("faster-whisper"):
+            model_size = model.split("-")[-1]
+            result = transcribe_with_faster_whisper(input_path, model_size, language, beam_size, best_of,
+                                                    without_timestamps)
+        elif model.startswith("openai-whisper"):
+            model_name = "-".join(model.split("-")[2:])
+            result = transcribe_with_ctranslate2_or_openai_whisper(input_path, model_name, language, beam_size, best_of,
+                                                                   without_timestamps)
+        elif model.startswith("trt-whisper"):
+            model_name = "-".join(model.split("-")[2:])
+            result = transcribe_with_trt_whisper(input_path, engine_dir, model_name, language)
+        elif model.startswith("onnx-whisper"):
+            model_name = "-".join(model.split("-")[2:])
+            result = transcribe_with_onnx_whisper(input_path, model_name, language)
         
         processing_time = time.time() - start_time
         
         if result:
             result["processingTime"] = processing_time
-            result["modelUsed"] = args.model
-            print(json.dumps({"success": True, "result": result}), flush=True)
-        else:
-            print(json.dumps({"success": False, "error": "Transcription failed"}), flush=True)
-            
+            result["modelUsed"] = model
+            return {"success": True, "result": result}
+        return {"success": False, "error": "Transcription failed"}
+        
     except Exception as e:
-        print(json.dumps({"success": False, "error": str(e)}), flush=True)
+        return {"success": False, "error": str(e)}
+
+def serve(default_model, default_language=None, engine_dir=None, beam_size=1, best_of=1, without_timestamps=False):
+    """
+    Handle transcription requests from stdin until it is closed
+    
+    Each input line is a JSON object with "input" and optionally "model",
+    "language", "beam_size", "best_of" and "without_timestamps"; each request
+    gets the same progress and result messages as a single CLI run. Loaded
+    models stay cached between requests.
+    """
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            emit({"success": False, "error": f"Invalid request: {e}"})
+            continue
+        
+        model = request.get("model", default_model)
+        if model not in MODEL_CHOICES:
+            response = {"success": False, "error": f"Unknown model: {model}"}
+        else:
+            response = transcribe_file(
+                request.get("input", ""),
+                model,
+                request.get("language", default_language),
+                request.get("engine_dir", engine_dir),
+                request.get("beam_size", beam_size),
+                request.get("best_of", best_of),
+                request.get("without_timestamps", without_timestamps)
+            )
+        emit(response)
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe audio using Whisper")
+    parser.add_argument("input", nargs="?", help="Input audio file")
+    parser.add_argument("--model", help="Model to use", choices=MODEL_CHOICES, default="faster-whisper-small")
+    parser.add_argument("--language", help="Language code (optional)", default=None)
+    parser.add_argument("--engine-dir", help="TensorRT-LLM Whisper engine directory (trt-whisper models)",
+                       default=os.environ.get("WHISPER_TRT_ENGINE_DIR"))
+    # Greedy decoding is about three times faster than a beam of 5; pass
+    # --beam-size 5 to trade that speed for accuracy
+    parser.add_argument("--beam-size", type=int, default=1, help="Beam size (1 for greedy decoding)")
+    parser.add_argument("--best-of", type=int, default=1,
+                       help="Candidates sampled when falling back to a non-zero temperature")
+    parser.add_argument("--no-timestamps", action="store_true",
+                       help="Skip timestamp tokens; segments then only carry window-level timing")
+    parser.add_argument("--serve", action="store_true",
+                       help="Read JSON requests from stdin and keep models loaded between them")
+    
+    args = parser.parse_args()
+    
+    preload_backend(args.model)
+    
+    if args.serve:
+        serve(args.model, args.language, args.engine_dir, args.beam_size, args.best_of, args.no_timestamps)
+        return
+    
+    if args.input is None:
+        parser.error("the input file is required unless --serve is given")
+    
+    emit(transcribe_file(args.input, args.model, args.language, args.engine_dir, args.beam_size, args.best_of,
+                         args.no_timestamps))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()